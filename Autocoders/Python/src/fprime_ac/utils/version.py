@@ -1,29 +1,179 @@
 """ fprime version handling and reporting """
 
+import functools
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 FALLBACK_VERSION = "v3.4.1"  # Keep up-to-date on release tag
 
+# Directories used to introspect framework and project versions, fixed for the lifetime of the process
+_FRAMEWORK_DIR = os.environ.get("FPRIME_FRAMEWORK_PATH") or os.path.dirname(__file__)
+_PROJECT_DIR = os.environ.get("FPRIME_PROJECT_ROOT") or os.path.dirname(__file__)
 
+
+def _find_repository_root(working_dir):
+    """Find the repository git would discover from working_dir, or None when discovery cannot be mirrored safely
+
+    Mirrors git's discovery: the walk starts at the physical (symlink-resolved) directory, looks for a `.git` entry
+    (directory for a standard checkout, file for submodules and worktrees), and stops at `GIT_CEILING_DIRECTORIES` and
+    filesystem boundaries unless `GIT_DISCOVERY_ACROSS_FILESYSTEM` is set. When `GIT_DIR` is set, git skips discovery
+    entirely and None is returned such that git runs in working_dir itself.
+    """
+    if os.environ.get("GIT_DIR"):
+        return None
+    ceilings = {
+        os.path.realpath(ceiling)
+        for ceiling in os.environ.get("GIT_CEILING_DIRECTORIES", "").split(os.pathsep)
+        if ceiling
+    }
+    across_filesystems = os.environ.get(
+        "GIT_DISCOVERY_ACROSS_FILESYSTEM", ""
+    ).lower() in ("1", "true", "yes", "on")
+    current = os.path.realpath(working_dir)
+    device = os.stat(current).st_dev
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current or parent in ceilings:
+            return None
+        if not across_filesystems and os.stat(parent).st_dev != device:
+            return None
+        current = parent
+
+
+# Cache of repository root to `git describe` output (None when git failed), see `_describe_repository`
+_REPOSITORY_VERSIONS = {}
+
+
+def _describe_repository(repository):
+    """Run `git describe --tags --always` in repository, returning None if git is not working. Cached per repository."""
+    if repository not in _REPOSITORY_VERSIONS:
+        try:
+            output = subprocess.check_output(
+                ["git", "describe", "--tags", "--always"], cwd=repository
+            )
+            _REPOSITORY_VERSIONS[repository] = output.strip().decode("ascii")
+        except Exception:
+            _REPOSITORY_VERSIONS[repository] = None
+    return _REPOSITORY_VERSIONS[repository]
+
+
+def _describe_repositories(repositories):
+    """Describe the uncached repositories concurrently, populating the repository cache. No threads are started unless
+    more than one repository still needs git."""
+    pending = [
+        repository
+        for repository in dict.fromkeys(repositories)
+        if repository not in _REPOSITORY_VERSIONS
+    ]
+    if len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = [
+                executor.submit(_describe_repository, repository)
+                for repository in pending
+            ]
+            for future in as_completed(futures):
+                future.result()
+
+
+def _read_version_file(working_dir):
+    """Read the VERSION file in working_dir, returning None if it does not exist or is empty"""
+    version_file = os.path.join(working_dir, "VERSION")
+    if not os.path.isfile(version_file):
+        return None
+    with open(version_file, encoding="utf-8") as file_handle:
+        version = file_handle.read().strip()
+    return version if version else None
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_working_dir(working_dir):
+    """Resolve working_dir to a (version, repository) tuple, touching the filesystem once per working directory
+
+    version is the contents of the VERSION file and repository is None when a usable VERSION file exists. Otherwise
+    version is None and repository is the directory in which to run git. Both are None when working_dir does not exist.
+    """
+    if not os.path.isdir(working_dir):
+        return None, None
+    version = _read_version_file(working_dir)
+    if version is not None:
+        return version, None
+    return None, _find_repository_root(working_dir) or working_dir
+
+
+def _lookup_version(resolution, fallback):
+    """Calculate the version of a resolved working directory, running git when it has no VERSION file"""
+    version, repository = resolution
+    if version is None and repository is not None:
+        version = _describe_repository(repository)
+    return version if version is not None else fallback
+
+
+@functools.lru_cache(maxsize=32)
 def get_version_str(working_dir, fallback=FALLBACK_VERSION):
     """
     System call to get the version. It uses `git describe --tags --always` to get a standard version string as used
     across fprime. The working directory should be set to a (project, library, fprime) from which to obtain the version.
 
+    When the working directory contains a non-empty `VERSION` file (e.g. a release archive without git history), its
+    contents are used directly and git is not run. Working directories that do not exist return the fallback.
+
+    Git results are cached per repository such that git is invoked at most once for all working directories within the
+    same checkout. This includes failures, which cache the fallback. `VERSION` file contents are cached per working
+    directory. Use `clear_version_cache` to reset, e.g. after a `VERSION` file changes.
+
     Args:
         working_dir: working directory to introspect for version
         fallback: version to fallback to if git is not working
     Return:
         String containing the version for the given working directory
     """
-    try:
-        output = subprocess.check_output(
-            ["git", "describe", "--tags", "--always"], cwd=working_dir
-        )
-        return output.strip().decode("ascii")
-    except Exception:
-        return fallback
+    return _lookup_version(_resolve_working_dir(working_dir), fallback)
+
+
+def get_all_versions(working_dirs, fallback=FALLBACK_VERSION) -> dict:
+    """Calculate the versions of multiple working directories concurrently
+
+    Each working directory is first resolved once to either its `VERSION` file contents or its enclosing repository, and
+    each unique repository is described on its own thread such that the git subprocesses run in parallel rather than one
+    after another. Resolving first ensures directories sharing a checkout run git once. No threads are started unless more than one repository still needs git.
+    Directories for which git fails are assigned the fallback.
+
+    Args:
+        working_dirs: list of working directories to introspect for version
+        fallback: version to fallback to if git is not working
+    Return:
+        Dictionary with the working directory as key and the version as value
+    """
+    resolutions = {
+        working_dir: _resolve_working_dir(working_dir)
+        for working_dir in working_dirs
+    }
+    _describe_repositories(
+        repository
+        for _, repository in resolutions.values()
+        if repository is not None
+    )
+    return {
+        working_dir: _lookup_version(resolution, fallback)
+        for working_dir, resolution in resolutions.items()
+    }
+
+
+@functools.lru_cache(maxsize=1)
+def _get_standard_versions() -> dict:
+    """Calculate framework and project versions in one batch, mapping failures to None"""
+    return get_all_versions([_FRAMEWORK_DIR, _PROJECT_DIR], fallback=None)
+
+
+def clear_version_cache():
+    """Clear cached version strings such that the next query re-runs git"""
+    _REPOSITORY_VERSIONS.clear()
+    _resolve_working_dir.cache_clear()
+    get_version_str.cache_clear()
+    _get_standard_versions.cache_clear()
 
 
 def get_fprime_version():
@@ -35,10 +185,8 @@ def get_fprime_version():
     Return:
         Version of fprime framework
     """
-    fprime_directory = os.environ.get(
-        "FPRIME_FRAMEWORK_PATH", os.path.dirname(__file__)
-    )
-    return get_version_str(working_dir=fprime_directory, fallback=FALLBACK_VERSION)
+    version = _get_standard_versions().get(_FRAMEWORK_DIR)
+    return version if version is not None else FALLBACK_VERSION
 
 
 def get_project_version(fallback=FALLBACK_VERSION):
@@ -53,8 +201,8 @@ def get_project_version(fallback=FALLBACK_VERSION):
     Return:
         Version of fprime framework
     """
-    fprime_directory = os.environ.get("FPRIME_PROJECT_ROOT", os.path.dirname(__file__))
-    return get_version_str(working_dir=fprime_directory, fallback=fallback)
+    version = _get_standard_versions().get(_PROJECT_DIR)
+    return version if version is not None else fallback
 
 
 def get_library_versions(fallback=FALLBACK_VERSION) -> dict:
@@ -65,10 +213,6 @@ def get_library_versions(fallback=FALLBACK_VERSION) -> dict:
     if fprime_libraries == "":
         return {}
 
-    lib_versions = {}
-    for library in fprime_libraries.split(":"):
-        library_name = os.path.basename(library)
-        lib_versions[library_name] = get_version_str(
-            working_dir=library, fallback=fallback
-        )
-    return lib_versions
+    libraries = fprime_libraries.split(":")
+    versions = get_all_versions(libraries, fallback=fallback)
+    return {os.path.basename(library): versions[library] for library in libraries}
@@ -0,0 +1,261 @@
+"""
+test_version.py:
+
+Checks that version lookups run git as few times as possible and fall back correctly.
+"""
+from pathlib import Path
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+
+from fprime_ac.utils import version
+
+
+class FakeGit:
+    """Stub for `subprocess.check_output` recording each git call and how many ran at once"""
+
+    def __init__(self):
+        self.calls = []
+        self.failing = set()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, args, cwd):
+        with self.lock:
+            self.calls.append(cwd)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)  # Keep the call running long enough for concurrent calls to overlap
+        with self.lock:
+            self.active -= 1
+        if cwd in self.failing:
+            raise subprocess.CalledProcessError(128, args)
+        return b"v9.9.9\n"
+
+
+@pytest.fixture
+def git(monkeypatch):
+    """Replace git with a FakeGit, clearing version caches around the test"""
+    fake = FakeGit()
+    monkeypatch.setattr(subprocess, "check_output", fake)
+    version.clear_version_cache()
+    yield fake
+    version.clear_version_cache()
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """Fake git checkout containing two subdirectories"""
+    (tmp_path / ".git").mkdir()
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    return tmp_path
+
+
+def test_repeat_calls_run_git_once(git, repository):
+    """Tests that repeated lookups of the same directory are served from the cache"""
+    for _ in range(3):
+        assert version.get_version_str(str(repository)) == "v9.9.9"
+    assert git.calls == [str(repository)]
+
+
+def test_failure_cached_as_fallback(git, repository):
+    """Tests that a git failure returns the fallback and is not retried"""
+    git.failing.add(str(repository))
+    assert version.get_version_str(str(repository), "v0.0.1") == "v0.0.1"
+    assert version.get_version_str(str(repository), "v0.0.1") == "v0.0.1"
+    assert len(git.calls) == 1
+
+
+def test_clear_version_cache(git, repository):
+    """Tests that clearing the cache re-runs git"""
+    version.get_version_str(str(repository))
+    version.clear_version_cache()
+    version.get_version_str(str(repository))
+    assert len(git.calls) == 2
+
+
+@pytest.fixture
+def make_repository(tmp_path_factory):
+    """Factory creating a separate fake git checkout on each call"""
+
+    def make(name="repository"):
+        path = tmp_path_factory.mktemp(name).resolve()
+        (path / ".git").mkdir()
+        return path
+
+    return make
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """Count the thread pools created by the version module"""
+    created = []
+
+    def counting_executor(*args, **kwargs):
+        created.append(kwargs.get("max_workers"))
+        return original(*args, **kwargs)
+
+    original = version.ThreadPoolExecutor
+    monkeypatch.setattr(version, "ThreadPoolExecutor", counting_executor)
+    return created
+
+
+def test_get_all_versions(git, make_repository):
+    """Tests that get_all_versions dedupes directories and assigns fallbacks per directory"""
+    good = str(make_repository())
+    bad = str(make_repository())
+    git.failing.add(bad)
+    versions = version.get_all_versions([good, bad, good], fallback="v0.0.1")
+    assert versions == {good: "v9.9.9", bad: "v0.0.1"}
+    assert sorted(git.calls) == sorted([good, bad])
+
+
+def test_get_all_versions_runs_concurrently(git, pools, make_repository):
+    """Tests that separate repositories are described in parallel within a single pool"""
+    repositories = [str(make_repository()) for _ in range(3)]
+    version.get_all_versions(repositories)
+    assert sorted(git.calls) == sorted(repositories)
+    assert git.max_active == 3
+    assert pools == [3]
+
+
+def test_get_all_versions_skips_pool(git, pools, make_repository):
+    """Tests that no pool is created for a single directory or for already cached repositories"""
+    repositories = [str(make_repository()) for _ in range(2)]
+    version.get_all_versions(repositories[:1])
+    assert pools == []
+    version.get_all_versions(repositories)
+    assert pools == []
+    version.get_all_versions(repositories)
+    assert pools == []
+    assert len(git.calls) == 2
+
+
+def test_standard_versions(git, pools, monkeypatch, make_repository):
+    """Tests that framework and project versions are computed in one batch, each with its own fallback"""
+    framework = str(make_repository("framework"))
+    project = str(make_repository("project"))
+    monkeypatch.setattr(version, "_FRAMEWORK_DIR", framework)
+    monkeypatch.setattr(version, "_PROJECT_DIR", project)
+    git.failing.add(project)
+    assert version.get_fprime_version() == "v9.9.9"
+    assert version.get_project_version() == version.FALLBACK_VERSION
+    assert version.get_project_version(fallback="v0.0.1") == "v0.0.1"
+    assert sorted(git.calls) == sorted([framework, project])
+    assert pools == [2]
+
+
+def test_library_versions(git, monkeypatch, make_repository):
+    """Tests that library versions are keyed by library directory name"""
+    monkeypatch.delenv("FPRIME_LIBRARY_LOCATIONS", raising=False)
+    assert version.get_library_versions() == {}
+    first = make_repository("first")
+    second = make_repository("second")
+    git.failing.add(str(second))
+    monkeypatch.setenv("FPRIME_LIBRARY_LOCATIONS", f"{first}:{second}")
+    assert version.get_library_versions(fallback="v0.0.1") == {
+        first.name: "v9.9.9",
+        second.name: "v0.0.1",
+    }
+
+
+def test_shared_repository_runs_git_once(git, make_repository):
+    """Tests that directories within one checkout run git once, even when looked up together"""
+    repository = make_repository()
+    (repository / "a").mkdir()
+    (repository / "b").mkdir()
+    versions = version.get_all_versions([str(repository / "a"), str(repository / "b")])
+    assert versions == {
+        str(repository / "a"): "v9.9.9",
+        str(repository / "b"): "v9.9.9",
+    }
+    assert git.calls == [str(repository)]
+
+
+def test_missing_directory_uses_fallback(git, make_repository):
+    """Tests that missing and empty directories return the fallback rather than an ancestor's version"""
+    missing = str(make_repository() / "missing")
+    assert version.get_version_str(missing, "v0.0.1") == "v0.0.1"
+    assert version.get_version_str("", "v0.0.1") == "v0.0.1"
+    assert version.get_all_versions([missing, ""], "v0.0.1") == {
+        missing: "v0.0.1",
+        "": "v0.0.1",
+    }
+    assert git.calls == []
+
+
+def test_symlink_uses_physical_repository(git, make_repository):
+    """Tests that a symlinked directory is described in the checkout it points into, as git would"""
+    project = make_repository("project")
+    other = make_repository("other")
+    (other / "sub").mkdir()
+    (project / "lib").mkdir()
+    (project / "lib" / "foo").symlink_to(other / "sub")
+    version.get_version_str(str(project / "lib" / "foo"))
+    assert git.calls == [str(other)]
+
+
+def test_ceiling_directories_stop_discovery(git, monkeypatch, make_repository):
+    """Tests that GIT_CEILING_DIRECTORIES prevents picking up an ancestor checkout"""
+    repository = make_repository()
+    (repository / "a" / "b").mkdir(parents=True)
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(repository / "a"))
+    version.get_version_str(str(repository / "a" / "b"))
+    assert git.calls == [str(repository / "a" / "b")]
+
+
+def test_git_dir_skips_discovery(git, monkeypatch, make_repository):
+    """Tests that git runs in the working directory itself when GIT_DIR is set"""
+    repository = make_repository()
+    (repository / "a").mkdir()
+    monkeypatch.setenv("GIT_DIR", str(repository / ".git"))
+    version.get_version_str(str(repository / "a"))
+    assert git.calls == [str(repository / "a")]
+
+
+@pytest.fixture
+def opens(monkeypatch):
+    """Count the files opened by the version module"""
+    opened = []
+
+    def counting_open(file, *args, **kwargs):
+        opened.append(file)
+        return open(file, *args, **kwargs)
+
+    monkeypatch.setattr(version, "open", counting_open, raising=False)
+    return opened
+
+
+def test_version_file_skips_git(git, tmp_path):
+    """Tests that a VERSION file is used without running git"""
+    (tmp_path / "VERSION").write_text("v1.2.3\n", encoding="utf-8")
+    assert version.get_version_str(str(tmp_path)) == "v1.2.3"
+    assert git.calls == []
+
+
+def test_empty_version_file_uses_git(git, make_repository):
+    """Tests that an empty VERSION file falls through to git"""
+    repository = make_repository()
+    (repository / "VERSION").write_text("  \n", encoding="utf-8")
+    assert version.get_version_str(str(repository)) == "v9.9.9"
+    assert git.calls == [str(repository)]
+
+
+def test_get_all_versions_with_version_file(git, opens, make_repository, tmp_path):
+    """Tests that batches mix VERSION files and git, reading each VERSION file once across lookups"""
+    repository = str(make_repository())
+    (tmp_path / "VERSION").write_text("v1.2.3", encoding="utf-8")
+    released = str(tmp_path)
+    versions = version.get_all_versions([repository, released])
+    assert versions == {repository: "v9.9.9", released: "v1.2.3"}
+    assert version.get_version_str(released, "v0.0.1") == "v1.2.3"
+    assert version.get_all_versions([released]) == {released: "v1.2.3"}
+    assert opens == [str(tmp_path / "VERSION")]
+    assert git.calls == [repository]